@@ -6,7 +6,7 @@ import csv
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from update_etymology_cli import EtymologyData, AnkiCardProcessor
+from update_etymology_cli import EtymologyData, AnkiCardProcessor, MeaningCache
 
 
 class TestAnkiCardProcessor:
@@ -107,4 +107,64 @@ class TestAnkiCardProcessor:
         
         # Clean up
         input_path.unlink()
-        output_path.unlink()
\ No newline at end of file
+        output_path.unlink()
+    
+    def test_process_file_with_cache(self, etymology_data, sample_tsv):
+        """Test that a second run reuses cached meaning fields."""
+        output_path = sample_tsv.with_suffix('.output.tsv')
+        cache_path = sample_tsv.with_suffix('.sqlite3')
+        
+        with MeaningCache(cache_path) as cache:
+            stats = AnkiCardProcessor(etymology_data, cache).process_file(
+                sample_tsv, output_path
+            )
+        assert stats['cache_hits'] == 0
+        assert stats['cache_misses'] == 1
+        with open(output_path, 'r', encoding='utf-8') as f:
+            first_rows = list(csv.reader(f, delimiter='\t'))
+        
+        with MeaningCache(cache_path) as cache:
+            stats = AnkiCardProcessor(etymology_data, cache).process_file(
+                sample_tsv, output_path
+            )
+        assert stats['cache_hits'] == 1
+        assert stats['cache_misses'] == 0
+        with open(output_path, 'r', encoding='utf-8') as f:
+            assert list(csv.reader(f, delimiter='\t')) == first_rows
+        
+        # Clean up
+        sample_tsv.unlink()
+        output_path.unlink()
+        cache_path.unlink()
+
+
+class TestMeaningCache:
+    """Test cases for MeaningCache class."""
+    
+    def test_key_depends_on_meaning_and_entry(self):
+        """Test that the key changes with the meaning field or the entry."""
+        entry = {'etymology': 'a', 'memory_aid': 'b', 'synonyms': 'c'}
+        key = MeaningCache.make_key('とにかく', entry)
+        
+        assert key == MeaningCache.make_key('とにかく', dict(entry))
+        assert key != MeaningCache.make_key('いずれにせよ', entry)
+        assert key != MeaningCache.make_key('とにかく', dict(entry, synonyms='d'))
+    
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test size-bounded LRU eviction, including across reopen."""
+        cache_path = tmp_path / 'cache.sqlite3'
+        
+        with MeaningCache(cache_path, max_entries=2) as cache:
+            cache.put('a', 'A')
+            cache.put('b', 'B')
+            assert cache.get('a') == 'A'
+            cache.put('c', 'C')
+        
+        with MeaningCache(cache_path, max_entries=2) as cache:
+            assert cache.get('b') is None
+            assert cache.get('a') == 'A'
+            assert cache.get('c') == 'C'
+        
+        with MeaningCache(cache_path, max_entries=1) as cache:
+            assert cache.get('a') is None
+            assert cache.get('c') == 'C'
@@ -6,13 +6,22 @@ A tool to enhance TOEIC vocabulary Anki cards with etymology information,
 memory aids, and synonyms.
 """
 import csv
+import hashlib
+import json
+import sqlite3
 import sys
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from types import TracebackType
+from typing import Dict, List, Tuple, Optional, Type
 import click
 from tqdm import tqdm
 
 
+# Bump whenever AnkiCardProcessor._format_meaning changes its output, so
+# fields cached by earlier runs are no longer reused.
+FORMAT_VERSION = 1
+
+
 class EtymologyData:
     """Manages etymology data loading and access."""
     
@@ -45,15 +54,138 @@ class EtymologyData:
         return len(self.data)
 
 
+class MeaningCache:
+    """Persistent LRU cache of enriched meaning fields, stored in SQLite.
+
+    Entries are keyed by a hash of the original meaning field and the
+    etymology entry, so identical cards are only formatted once across
+    runs and decks.
+    """
+    
+    def __init__(self, db_path: Path, max_entries: int = 10000):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive: {max_entries}")
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._clock = 0
+        self._pending_last_used: Dict[str, int] = {}
+        self._size = 0
+        
+    def open(self) -> None:
+        """Open (and create if needed) the cache database."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meanings ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS meanings_last_used ON meanings (last_used)"
+        )
+        clock, size = self._conn.execute(
+            "SELECT COALESCE(MAX(last_used), 0), COUNT(*) FROM meanings"
+        ).fetchone()
+        self._clock = clock
+        self._size = size
+        self._evict()
+        
+    def close(self) -> None:
+        """Commit pending changes and close the database."""
+        if self._conn is not None:
+            self._flush_last_used()
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+            
+    def __enter__(self) -> "MeaningCache":
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type: Optional[Type[BaseException]],
+                 exc: Optional[BaseException],
+                 tb: Optional[TracebackType]) -> None:
+        self.close()
+        
+    @staticmethod
+    def make_key(meaning_field: str, word_data: Dict[str, str]) -> str:
+        """Build the cache key for a meaning field and etymology entry."""
+        payload = json.dumps(
+            [FORMAT_VERSION, meaning_field, word_data['etymology'],
+             word_data['memory_aid'], word_data['synonyms']],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached field, marking it as recently used."""
+        row = self._connection().execute(
+            "SELECT value FROM meanings WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._clock += 1
+        self._pending_last_used[key] = self._clock
+        value: str = row[0]
+        return value
+    
+    def put(self, key: str, value: str) -> None:
+        """Store a field, evicting least recently used entries if needed."""
+        conn = self._connection()
+        self._clock += 1
+        self._pending_last_used.pop(key, None)
+        cursor = conn.execute(
+            "UPDATE meanings SET value = ?, last_used = ? WHERE key = ?",
+            (value, self._clock, key)
+        )
+        if cursor.rowcount == 0:
+            conn.execute(
+                "INSERT INTO meanings (key, value, last_used) VALUES (?, ?, ?)",
+                (key, value, self._clock)
+            )
+            self._size += 1
+            self._evict()
+            
+    def _evict(self) -> None:
+        """Drop the least recently used entries beyond max_entries."""
+        excess = self._size - self.max_entries
+        if excess > 0:
+            self._flush_last_used()
+            self._connection().execute(
+                "DELETE FROM meanings WHERE key IN ("
+                "SELECT key FROM meanings ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self._size -= excess
+            
+    def _flush_last_used(self) -> None:
+        """Write recency updates from cache hits in a single batch."""
+        if self._pending_last_used:
+            self._connection().executemany(
+                "UPDATE meanings SET last_used = ? WHERE key = ?",
+                [(clock, key) for key, clock in self._pending_last_used.items()]
+            )
+            self._pending_last_used.clear()
+            
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError("Cache is not open")
+        return self._conn
+
+
 class AnkiCardProcessor:
     """Processes Anki TSV files to add etymology information."""
     
-    def __init__(self, etymology_data: EtymologyData):
+    def __init__(self, etymology_data: EtymologyData,
+                 cache: Optional[MeaningCache] = None):
         self.etymology_data = etymology_data
+        self.cache = cache
         self.stats = {
             'total': 0,
             'updated': 0,
-            'skipped': 0
+            'skipped': 0,
+            'cache_hits': 0,
+            'cache_misses': 0
         }
         
     def process_file(self, input_path: Path, output_path: Path, 
@@ -92,8 +224,25 @@ class AnkiCardProcessor:
         return self.stats
     
     def _update_row(self, row: List[str], word_data: Dict[str, str]) -> None:
-        """Update a row with etymology information."""
-        meaning_field = row[3]
+        """Update a row with etymology information, using the cache if set."""
+        if self.cache is None:
+            row[3] = self._format_meaning(row[3], word_data)
+            return
+            
+        key = MeaningCache.make_key(row[3], word_data)
+        cached = self.cache.get(key)
+        if cached is not None:
+            row[3] = cached
+            self.stats['cache_hits'] += 1
+            return
+            
+        row[3] = self._format_meaning(row[3], word_data)
+        self.cache.put(key, row[3])
+        self.stats['cache_misses'] += 1
+    
+    @staticmethod
+    def _format_meaning(meaning_field: str, word_data: Dict[str, str]) -> str:
+        """Build the enriched meaning field."""
         lines = meaning_field.split('\n')
         
         # Keep the first line (Japanese translation)
@@ -104,7 +253,7 @@ class AnkiCardProcessor:
         updated_lines.append(f"【記憶補助】{word_data['memory_aid']}")
         updated_lines.append(f"【類義語】{word_data['synonyms']}")
         
-        row[3] = '\n'.join(updated_lines)
+        return '\n'.join(updated_lines)
 
 
 def create_backup(file_path: Path) -> Path:
@@ -146,8 +295,26 @@ def create_backup(file_path: Path) -> Path:
     default=True,
     help='Create backup of output file if it exists'
 )
+@click.option(
+    '--cache-file',
+    type=click.Path(dir_okay=False, path_type=Path),
+    default='.etymology_cache.sqlite3',
+    help='Path to the persistent cache of enriched meaning fields'
+)
+@click.option(
+    '--cache-size',
+    type=click.IntRange(min=1),
+    default=10000,
+    help='Maximum number of cached meaning fields (default: 10000)'
+)
+@click.option(
+    '--cache/--no-cache',
+    default=False,
+    help='Reuse enriched meaning fields from previous runs'
+)
 def main(etymology_csv: Path, input_tsv: Path, output_tsv: Path, 
-         encoding: str, backup: bool) -> None:
+         encoding: str, backup: bool, cache_file: Path, cache_size: int,
+         cache: bool) -> None:
     """
     Enhance Anki cards with etymology information.
     
@@ -174,16 +341,26 @@ def main(etymology_csv: Path, input_tsv: Path, output_tsv: Path,
     
     # Process the file
     click.echo(f"\n🔄 Processing TSV file...")
-    processor = AnkiCardProcessor(etymology)
+    meaning_cache = MeaningCache(cache_file, cache_size) if cache else None
+    processor = AnkiCardProcessor(etymology, meaning_cache)
     
     try:
-        stats = processor.process_file(input_tsv, output_tsv, encoding)
+        if meaning_cache is not None:
+            meaning_cache.open()
+        try:
+            stats = processor.process_file(input_tsv, output_tsv, encoding)
+        finally:
+            if meaning_cache is not None:
+                meaning_cache.close()
         
         click.echo(f"\n✅ Success! Output saved to: {output_tsv}")
         click.echo("\n📊 Statistics:")
         click.echo(f"   • Total cards processed: {stats['total']}")
         click.echo(f"   • Cards enhanced: {stats['updated']}")
         click.echo(f"   • Cards skipped (no data): {stats['skipped']}")
+        if meaning_cache is not None:
+            click.echo(f"   • Cache hits: {stats['cache_hits']}")
+            click.echo(f"   • Cache misses: {stats['cache_misses']}")
         
         if stats['skipped'] > 0:
             click.echo(f"\n💡 Tip: Add more words to {etymology_csv} to enhance more cards!")